@@ -11,6 +11,7 @@ from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
+import PIL
 
 from app.config import load_settings
 from app.errors import AppError, InvalidInputError, UnauthorizedError, error_payload
@@ -42,6 +43,8 @@ app.mount("/static", StaticFiles(directory=WEB_DIR), name="static")
 
 @app.on_event("startup")
 async def startup_event() -> None:
+    # Pillow-SIMD reports a ".postN" suffix, which makes the active build visible in the logs.
+    _LOGGER.info("Image backend: Pillow %s", PIL.__version__)
     service.bootstrap()
     service.trigger_refresh(force=True, wait=False)
     stdin_processor.start()
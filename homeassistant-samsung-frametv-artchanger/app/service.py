@@ -320,12 +320,19 @@ class GalleryService:
         # Older add-on releases persisted this file in /share/SamsungFrameTVArtChanger.
         # Keep these paths in migration lookup to preserve TV content_id mappings and
         # avoid unnecessary re-uploads that can create duplicates on TV.
+        raw_dirs = [
+            self.settings.data_dir,
+            os.path.join("/share", "SamsungFrameTVArtChanger"),
+            "/share",
+            "/",
+            self.settings.media_dir,
+        ]
+        # art.py writes uploaded_files.jsonl, importing the JSON list into it on first
+        # run, so the JSONL history is the more complete one when both exist.
         raw_candidates = [
-            os.path.join(self.settings.data_dir, "uploaded_files.json"),
-            os.path.join("/share", "SamsungFrameTVArtChanger", "uploaded_files.json"),
-            os.path.join("/share", "uploaded_files.json"),
-            "/uploaded_files.json",
-            os.path.join(self.settings.media_dir, "uploaded_files.json"),
+            os.path.join(directory, name)
+            for directory in raw_dirs
+            for name in ("uploaded_files.jsonl", "uploaded_files.json")
         ]
 
         unique: List[str] = []
@@ -345,13 +352,8 @@ class GalleryService:
         if not legacy_path:
             return False
 
-        try:
-            with open(legacy_path, "r", encoding="utf-8") as handle:
-                entries = json.load(handle)
-        except (OSError, json.JSONDecodeError):
-            return False
-
-        if not isinstance(entries, list):
+        entries = self._read_legacy_uploaded_files(legacy_path)
+        if entries is None:
             return False
 
         changed = False
@@ -403,14 +405,55 @@ class GalleryService:
             changed = True
 
         if changed:
-            migrated_path = f"{legacy_path}.migrated"
-            try:
-                os.replace(legacy_path, migrated_path)
-            except OSError:
-                pass
+            migrated_paths = [legacy_path]
+            if legacy_path.endswith(".jsonl"):
+                # The JSON list next to it was already imported into the JSONL history
+                sibling = legacy_path[: -len(".jsonl")] + ".json"
+                if os.path.exists(sibling):
+                    migrated_paths.append(sibling)
+            for path in migrated_paths:
+                try:
+                    os.replace(path, f"{path}.migrated")
+                except OSError:
+                    pass
 
         return changed
 
+    def _read_legacy_uploaded_files(self, legacy_path: str) -> Optional[List[Any]]:
+        if not legacy_path.endswith(".jsonl"):
+            try:
+                with open(legacy_path, "r", encoding="utf-8") as handle:
+                    entries = json.load(handle)
+            except (OSError, json.JSONDecodeError):
+                return None
+            return entries if isinstance(entries, list) else None
+
+        # One record per line; {"op": "del", "key": [file, source, tv_ip]} removes an
+        # earlier entry and later entries replace earlier ones with the same key.
+        live: Dict[Any, Dict[str, Any]] = {}
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as handle:
+                for line in handle:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash mid-append can leave a truncated last line behind
+                        continue
+                    if not isinstance(record, dict):
+                        continue
+                    if record.get("op") == "del":
+                        key = record.get("key")
+                        if isinstance(key, list):
+                            live.pop(tuple(key), None)
+                        continue
+                    live[(record.get("file"), record.get("source"), record.get("tv_ip"))] = record
+        except OSError:
+            return None
+        return list(live.values())
+
     def resolve_tv_ips(self, tv_ips: Optional[Iterable[str]] = None) -> List[str]:
         self._sync_runtime_settings_from_disk()
         configured = list(self.settings.tv_ips)
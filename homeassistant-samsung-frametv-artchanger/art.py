@@ -1,15 +1,18 @@
 import sys
 import logging
 import os
-import json
 import argparse
-from io import BytesIO
+import importlib
+import threading
 import random
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
 
 sys.path.append('../')
 
 from samsungtvws import SamsungTVWS
-from sources import bing_wallpapers, google_art, media_folder
+from utils.image_cache import ResizedImageCache, RunImageCache
+from utils.uploaded_files import UploadedFilesStore
 from utils.utils import Utils
 
 # Add command line argument parsing
@@ -23,112 +26,196 @@ parser.add_argument('--download-high-res', action='store_true', help='Download h
 parser.add_argument('--bing-wallpapers', action='store_true', help='Download and upload image from Bing Wallpapers')
 parser.add_argument('--media-folder', action='store_true', help='Use images from the local media folder')
 parser.add_argument('--debugimage', action='store_true', help='Save downloaded and resized images for inspection')
+parser.add_argument('--gpu-resize', action='store_true', help='Resize JPEG images on a CUDA device when torch and torchvision are installed')
 
 args = parser.parse_args()
 
 # Set the path to the file that will store the list of uploaded filenames
-upload_list_path = 'uploaded_files.json'
+upload_list_path = 'uploaded_files.jsonl'
+legacy_upload_list_path = 'uploaded_files.json'
 
-# Load the list of uploaded filenames from the file
-if os.path.isfile(upload_list_path):
-    with open(upload_list_path, 'r') as f:
-        uploaded_files = json.load(f)
-else:
-    uploaded_files = []
+# Set the path to the folder that keeps resized images between runs
+image_cache_dir = os.path.join('cache', 'images')
 
 # Increase debug level
 logging.basicConfig(level=logging.INFO)
 
-sources = []
-if args.bing_wallpapers:
-    sources.append(bing_wallpapers)
-if args.google_art:
-    sources.append(google_art)
-if args.media_folder:
-    sources.append(media_folder)
+# Check the TV addresses before any source touches the network or the disk cache
+tvip = args.tvip.split(',') if args.tvip else []
+if not tvip:
+    logging.error('No TV IP addresses specified. Please use --tvip')
+    sys.exit(1)
+
+# Load the list of uploaded filenames, importing the old JSON list (left untouched) on first run
+uploaded_files = UploadedFilesStore(upload_list_path, legacy_path=legacy_upload_list_path)
+
+# Only import the sources that were asked for; each pulls in its own dependencies
+source_names = ['bing_wallpapers', 'google_art', 'media_folder']
+sources = [importlib.import_module(f'sources.{name}') for name in source_names if getattr(args, name)]
 
 if not sources:
     logging.error('No image source specified. Please use --google-art, --bing-wallpapers, or --media-folder')
     sys.exit(1)
 
-tvip = args.tvip.split(',') if args.tvip else []
+# Keep the sources equally likely, but demote a source once the history has uploaded all of its
+# images, so it stops producing repeats while others still have new ones
+exhausted_source_weight = 0.05
+
+def source_weight(source) -> float:
+    if not hasattr(source, 'estimate_unseen'):
+        return 1
+    return 1 if source.estimate_unseen(uploaded_files) > 0 else exhausted_source_weight
+
+source_weights = [source_weight(source) for source in sources]
+
 use_same_image = args.same_image
+# Flags read inside the per-TV and per-image functions, looked up once here
+upload_all = args.upload_all
+debug_image = args.debugimage
+# Settle the resize backend once, so the disk cache tag names the one that actually runs
+gpu_resize = args.gpu_resize and Utils.cuda_resize_available()
 
 utils = Utils(args.tvip, uploaded_files)
 
-def process_tv(tv_ip: str, image_data: BytesIO, file_type: str, image_url: str, remote_filename: str, source_name: str):
-    tv = SamsungTVWS(tv_ip)
-    
-    # Check if TV supports art mode
-    if not tv.art().supported():
-        logging.warning(f'TV at {tv_ip} does not support art mode.')
-        return
-
-    if remote_filename is None:
-        try:
-            logging.info(f'Uploading image to TV at {tv_ip}')
-            remote_filename = tv.art().upload(image_data.getvalue(), file_type=file_type, matte="none")
-            if remote_filename is None:
-                raise Exception('No remote filename returned')
-
-            tv.art().select_image(remote_filename, show=True)
-            logging.info(f'Image uploaded and selected on TV at {tv_ip}')
-            # Add the filename to the list of uploaded filenames
-            uploaded_files.append({
-                'file': image_url,
-                'remote_filename': remote_filename,
-                'tv_ip': tv_ip if len(tvip) > 1 else None,
-                'source': source_name
-            })
-            # Save the list of uploaded filenames to the file
-            with open(upload_list_path, 'w') as f:
-                json.dump(uploaded_files, f)
-        except Exception as e:
-            logging.error(f'There was an error uploading the image to TV at {tv_ip}: ' + str(e))
-    else:
-        if not args.upload_all:
-            # Select the image using the remote file name only if not in 'upload-all' mode
-            logging.info(f'Setting existing image on TV at {tv_ip}, skipping upload')
-            tv.art().select_image(remote_filename, show=True)
-
-def get_image_for_tv(tv_ip: str):
-    selected_source = random.choice(sources)
+max_tv_workers = 8
+# Downloads and resizes run beside the TV workers; resizing is CPU bound, so keep this small
+max_download_workers = 2
+tv_timeout = 30
+
+# One connection and art handle per TV for the lifetime of the process; the
+# per-TV lock keeps concurrent workers from interleaving on one websocket
+tv_connections: Dict[str, Tuple[SamsungTVWS, Any]] = {}
+tv_locks: Dict[str, threading.Lock] = {}
+tv_connections_lock = threading.Lock()
+
+# Resized images downloaded during this run, keyed by (source name, image url)
+image_cache = RunImageCache()
+
+# Resized images from earlier runs, swept down to the size limit on startup. The tag
+# covers every option that changes the resized bytes
+image_cache_tag = f'{Utils.resize_cache_tag(use_gpu=gpu_resize)}:high_res={args.download_high_res}'
+disk_image_cache = ResizedImageCache(image_cache_dir, tag=image_cache_tag)
+disk_image_cache.cleanup()
+
+def get_tv_art(tv_ip: str):
+    with tv_connections_lock:
+        if tv_ip not in tv_connections:
+            tv = SamsungTVWS(tv_ip, timeout=tv_timeout)
+            tv_connections[tv_ip] = (tv, tv.art())
+            tv_locks[tv_ip] = threading.Lock()
+        return tv_connections[tv_ip][1], tv_locks[tv_ip]
+
+def process_tv(tv_ip: str, image_future: Optional[Future], image_url: str, remote_filename: str, source_name: str):
+    art, tv_lock = get_tv_art(tv_ip)
+
+    with tv_lock:
+        # Check if TV supports art mode
+        if not art.supported():
+            logging.warning(f'TV at {tv_ip} does not support art mode.')
+            return
+
+        if remote_filename is None:
+            try:
+                # The image was downloading while the TV connection was being set up
+                image_data, file_type = image_future.result()
+            except Exception as e:
+                logging.error(f'There was an error downloading or preparing the image for TV at {tv_ip}: ' + str(e))
+                return
+            if image_data is None:
+                logging.error(f'No image available to upload to TV at {tv_ip}')
+                return
+
+            try:
+                logging.info(f'Uploading image to TV at {tv_ip}')
+                remote_filename = art.upload(image_data, file_type=file_type, matte="none")
+                if remote_filename is None:
+                    raise Exception('No remote filename returned')
+
+                art.select_image(remote_filename, show=True)
+                logging.info(f'Image uploaded and selected on TV at {tv_ip}')
+                # Add the filename to the list of uploaded filenames and append it to the file
+                uploaded_files.add({
+                    'file': image_url,
+                    'remote_filename': remote_filename,
+                    'tv_ip': utils.history_tv_ip(tv_ip),
+                    'source': source_name
+                })
+            except Exception as e:
+                logging.error(f'There was an error uploading the image to TV at {tv_ip}: ' + str(e))
+        else:
+            if not upload_all:
+                # Select the image using the remote file name only if not in 'upload-all' mode
+                logging.info(f'Setting existing image on TV at {tv_ip}, skipping upload')
+                art.select_image(remote_filename, show=True)
+
+def select_image_url():
+    selected_source = random.choices(sources, weights=source_weights, k=1)[0]
     logging.info(f'Selected source: {selected_source.__name__}')
 
-    image_url = selected_source.get_image_url(args)
+    return selected_source, selected_source.get_image_url(args)
+
+def get_image_for_tv(tv_ip: str):
+    selected_source, image_url = select_image_url()
     remote_filename = utils.get_remote_filename(image_url, selected_source.__name__, tv_ip)
 
     if remote_filename:
-        return None, None, image_url, remote_filename, selected_source.__name__
-
-    image_data, file_type = selected_source.get_image(args, image_url)
+        return None, image_url, remote_filename, selected_source.__name__
+
+    image_future = download_executor.submit(ensure_image_data, selected_source, image_url)
+    return image_future, image_url, None, selected_source.__name__
+
+def ensure_image_data(selected_source, image_url: str) -> Tuple[Optional[bytes], Optional[str]]:
+    # TVs that picked the same image wait for the first download instead of repeating it
+    prepared = image_cache.get_or_create(
+        (selected_source.__name__, image_url),
+        lambda: prepare_image_data(selected_source, image_url),
+    )
+    return prepared if prepared is not None else (None, None)
+
+def prepare_image_data(selected_source, image_url: str) -> Optional[Tuple[bytes, str]]:
+    cache_version = selected_source.cache_version(image_url) if hasattr(selected_source, 'cache_version') else None
+    cached_data = disk_image_cache.get(selected_source.__name__, image_url, cache_version)
+    if cached_data is not None:
+        logging.info(f'Using cached resized image for {image_url}')
+        return cached_data, 'JPEG'
+
+    # The source's own file type is not used: the resized output is always JPEG
+    image_data, _ = selected_source.get_image(args, image_url)
     if image_data is None:
-        return None, None, None, None, None
+        return None
 
     save_debug_image(image_data, f'debug_{selected_source.__name__}_original.jpg')
 
     logging.info('Resizing and cropping the image...')
-    resized_image_data = utils.resize_and_crop_image(image_data)
+    resized_image_data = utils.resize_and_crop_image(image_data, use_gpu=gpu_resize)
 
     save_debug_image(resized_image_data, f'debug_{selected_source.__name__}_resized.jpg')
 
-    return resized_image_data, file_type, image_url, None, selected_source.__name__
+    disk_image_cache.put(selected_source.__name__, image_url, resized_image_data, cache_version)
+    return resized_image_data, 'JPEG'
 
-def save_debug_image(image_data: BytesIO, filename: str) -> None:
-    if args.debugimage:
-        with open(filename, 'wb') as f:
-            f.write(image_data.getvalue())
-        logging.info(f'Debug image saved as {filename}')
+def write_debug_image(image_data: bytes, filename: str) -> None:
+    with open(filename, 'wb') as f:
+        f.write(image_data)
+    logging.info(f'Debug image saved as {filename}')
 
-if tvip:
+# Without --debugimage the debug saves are bound to a no-op instead of checking the flag on every call
+save_debug_image = write_debug_image if debug_image else (lambda image_data, filename: None)
+
+def process_tv_with_own_image(tv_ip: str):
+    image_future, image_url, remote_filename, source_name = get_image_for_tv(tv_ip)
+    process_tv(tv_ip, image_future, image_url, remote_filename, source_name)
+
+with ThreadPoolExecutor(max_workers=max_download_workers) as download_executor, \
+        ThreadPoolExecutor(max_workers=min(max_tv_workers, len(tvip))) as executor:
     if len(tvip) > 1 and use_same_image:
-        image_data, file_type, image_url, remote_filename, source_name = get_image_for_tv(None)
-        for tv_ip in tvip:
-            process_tv(tv_ip, image_data, file_type, image_url, remote_filename, source_name)
+        selected_source, image_url = select_image_url()
+        source_name = selected_source.__name__
+        # Look up every TV at once; only download when at least one TV is missing the image
+        remote_filenames = utils.get_remote_filenames(image_url, source_name, tvip)
+        image_future = None
+        if None in remote_filenames.values():
+            image_future = download_executor.submit(ensure_image_data, selected_source, image_url)
+        list(executor.map(lambda tv_ip: process_tv(tv_ip, image_future, image_url, remote_filenames[tv_ip], source_name), tvip))
     else:
-        for tv_ip in tvip:
-            image_data, file_type, image_url, remote_filename, source_name = get_image_for_tv(tv_ip)
-            process_tv(tv_ip, image_data, file_type, image_url, remote_filename, source_name)
-else:
-    logging.error('No TV IP addresses specified. Please use --tvip')
-    sys.exit(1)
+        list(executor.map(process_tv_with_own_image, tvip))
@@ -3,16 +3,29 @@ import random
 import requests
 import subprocess
 import os
-from io import BytesIO
+from functools import lru_cache
 from typing import Optional, Tuple, Union, List, Dict
 
-def get_image_url(args):
+@lru_cache(maxsize=1)
+def get_image_list() -> list[dict[str, Union[str, dict]]]:
+    # Cached for the run, so the list is fetched once rather than once per TV
     logging.info('Fetching image list from Google Arts & Culture...')
     json_url = "https://www.gstatic.com/culturalinstitute/tabext/imax_2_2.json"
+    response = requests.get(json_url)
+    response.raise_for_status()
+    return response.json()
+
+def estimate_unseen(uploaded_files) -> int:
+    try:
+        image_urls = {f"https://artsandculture.google.com/{image['link']}" for image in get_image_list()}
+    except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+        logging.error(f"Error getting image list: {str(e)}")
+        return 1
+    return len(image_urls - uploaded_files.files(__name__))
+
+def get_image_url(args):
     try:
-        response = requests.get(json_url)
-        response.raise_for_status()
-        image_list: list[dict[str, Union[str, dict]]] = response.json()
+        image_list: list[dict[str, Union[str, dict]]] = get_image_list()
         if not image_list:
             raise ValueError("Empty image list received")
 
@@ -22,7 +35,7 @@ def get_image_url(args):
         logging.error(f"Error getting image url: {str(e)}")
         return None
 
-def get_image(args, image_url) -> Tuple[Optional[BytesIO], Optional[str]]:
+def get_image(args, image_url) -> Tuple[Optional[bytes], Optional[str]]:
     download_high_res = args.download_high_res
 
     if download_high_res:
@@ -32,7 +45,7 @@ def get_image(args, image_url) -> Tuple[Optional[BytesIO], Optional[str]]:
         try:
             subprocess.run(["dezoomify-rs", "--max-width", "5001", "--compression", "0", image_url, output_file], check=True)
             with open(output_file, 'rb') as f:
-                image_data: BytesIO = BytesIO(f.read())
+                image_data: bytes = f.read()
             os.remove(output_file)  # Clean up the temporary file
             return image_data, 'JPEG'
         except subprocess.CalledProcessError as e:
@@ -47,7 +60,7 @@ def get_image(args, image_url) -> Tuple[Optional[BytesIO], Optional[str]]:
             logging.info(f'Downloading image from {image_url}')
             image_response = requests.get(image_url)
             image_response.raise_for_status()
-            image_data = BytesIO(image_response.content)
+            image_data = image_response.content
         
             return image_data, 'JPEG'
         except (requests.RequestException, ValueError, KeyError) as e:
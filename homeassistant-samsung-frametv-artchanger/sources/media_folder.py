@@ -1,7 +1,6 @@
 import os
 import logging
 import random
-from io import BytesIO
 from typing import List, Tuple, Optional, Dict
 
 folder_path = 'frame'
@@ -10,6 +9,18 @@ def get_media_folder_images() -> List[str]:
     """Get a list of JPG/PNG files in the folder, and search recursively if you want to use subdirectories"""
     return [os.path.join(root, f) for root, dirs, files in os.walk(folder_path) for f in files if f.endswith('.jpg') or f.endswith('.png')]
 
+def estimate_unseen(uploaded_files) -> int:
+    files = {os.path.basename(f) for f in get_media_folder_images()}
+    return len(files - uploaded_files.files(__name__))
+
+def cache_version(image_url) -> Optional[str]:
+    # Files can be replaced under the same name, so resized copies are tied to the file's mtime and size
+    try:
+        stat = os.stat(os.path.join(folder_path, image_url))
+    except OSError:
+        return None
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
 def get_image_url(args):
     files = get_media_folder_images()
     if not files:
@@ -18,7 +29,7 @@ def get_image_url(args):
     selected_file = random.choice(files)
     return f"{os.path.basename(selected_file)}"
 
-def get_image(args, image_url) -> Tuple[Optional[BytesIO], Optional[str]]:
+def get_image(args, image_url) -> Tuple[Optional[bytes], Optional[str]]:
     full_path = os.path.join(folder_path, image_url)
     if not os.path.exists(full_path):
         logging.error(f"File not found: {full_path}")
@@ -26,5 +37,5 @@ def get_image(args, image_url) -> Tuple[Optional[BytesIO], Optional[str]]:
     
     file_type = 'JPEG' if full_path.endswith('.jpg') else 'PNG'
     with open(full_path, 'rb') as f:
-        data = BytesIO(f.read())
+        data = f.read()
     return data, file_type
\ No newline at end of file
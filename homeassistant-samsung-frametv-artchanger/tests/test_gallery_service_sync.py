@@ -303,6 +303,53 @@ class GalleryServiceSyncTests(unittest.TestCase):
         expected = os.path.join("/share", "SamsungFrameTVArtChanger", "uploaded_files.json")
         self.assertIn(expected, candidates)
 
+        jsonl = os.path.join("/share", "SamsungFrameTVArtChanger", "uploaded_files.jsonl")
+        self.assertIn(jsonl, candidates)
+        self.assertLess(candidates.index(jsonl), candidates.index(expected))
+
+    def test_legacy_jsonl_history_replays_tombstones(self):
+        snapshot = types.SimpleNamespace(
+            online=True,
+            supported=True,
+            available_ids={"cid-kept"},
+            available_items={"cid-kept": {"content_id": "cid-kept", "title": "Kept art"}},
+            active_id=None,
+            error=None,
+        )
+        service, store = self._make_service(FakeTVClientActivation(snapshot))
+
+        with open(os.path.join(service.settings.media_dir, "photo.jpg"), "wb") as handle:
+            handle.write(self._sample_image())
+
+        service.bootstrap()
+        state = store.load()
+
+        legacy_json = os.path.join(self.tmp.name, "uploaded_files.json")
+        with open(legacy_json, "w", encoding="utf-8") as handle:
+            handle.write('[{"file":"photo.jpg","remote_filename":"cid-old","tv_ip":"192.168.10.170","source":"media_folder"}]')
+        legacy_jsonl = os.path.join(self.tmp.name, "uploaded_files.jsonl")
+        with open(legacy_jsonl, "w", encoding="utf-8") as handle:
+            handle.write(
+                '{"file":"photo.jpg","remote_filename":"cid-old","tv_ip":"192.168.10.170","source":"media_folder"}\n'
+                '{"op":"del","key":["photo.jpg","media_folder","192.168.10.170"]}\n'
+                '{"file":"photo.jpg","remote_filename":"cid-kept","tv_ip":"192.168.10.170","source":"media_folder"}\n'
+                '{"file":"gone.jpg","remote_filename":"cid-gone","tv_ip":"192.168.10.170","source":"media_folder"}\n'
+                '{"op":"del","key":["gone.jpg","media_folder","192.168.10.170"]}\n'
+            )
+
+        service._legacy_uploaded_files_candidates = lambda: [legacy_jsonl, legacy_json]
+        changed = service._migrate_legacy_uploaded_files(state)
+        self.assertTrue(changed)
+
+        assets = state["assets"]
+        self.assertEqual(len(assets), 1)
+        asset = next(iter(assets.values()))
+        self.assertEqual(asset["tv_map"][TV_IP]["content_id"], "cid-kept")
+        # The JSON list was already imported into the JSONL history, so both are retired
+        self.assertFalse(os.path.exists(legacy_jsonl))
+        self.assertFalse(os.path.exists(legacy_json))
+        self.assertTrue(os.path.exists(f"{legacy_jsonl}.migrated"))
+
     def test_legacy_content_mapping_prevents_reupload_duplicates(self):
         snapshot = types.SimpleNamespace(
             online=True,
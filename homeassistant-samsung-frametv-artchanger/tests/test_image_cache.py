@@ -0,0 +1,85 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from utils.image_cache import ResizedImageCache, RunImageCache
+
+
+class ResizedImageCacheTests(unittest.TestCase):
+    def test_put_and_get_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResizedImageCache(os.path.join(tmp, "images"))
+            self.assertIsNone(cache.get("bing_wallpapers", "https://example.com/a.jpg"))
+
+            cache.put("bing_wallpapers", "https://example.com/a.jpg", b"resized")
+            self.assertEqual(cache.get("bing_wallpapers", "https://example.com/a.jpg"), b"resized")
+            self.assertIsNone(cache.get("google_art", "https://example.com/a.jpg"))
+
+    def test_tag_and_version_are_part_of_the_key(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, "images")
+            cache = ResizedImageCache(cache_dir, tag="v2:3840x2160")
+            cache.put("media_folder", "a.jpg", b"resized", version="100:2048")
+
+            self.assertEqual(cache.get("media_folder", "a.jpg", version="100:2048"), b"resized")
+            self.assertIsNone(cache.get("media_folder", "a.jpg", version="200:2048"))
+            self.assertIsNone(cache.get("media_folder", "a.jpg"))
+            self.assertIsNone(ResizedImageCache(cache_dir, tag="v2:1920x1080").get("media_folder", "a.jpg", version="100:2048"))
+
+    def test_cleanup_removes_least_recently_used_over_limit(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResizedImageCache(os.path.join(tmp, "images"), max_bytes=20)
+            cache.put("media_folder", "old.jpg", b"x" * 10)
+            cache.put("media_folder", "new.jpg", b"x" * 10)
+            cache.put("media_folder", "used.jpg", b"x" * 10)
+
+            past = time.time() - 60
+            for name in os.listdir(cache.cache_dir):
+                os.utime(os.path.join(cache.cache_dir, name), (past, past))
+            os.utime(cache._path("media_folder", "new.jpg"), (past + 1, past + 1))
+            cache.get("media_folder", "used.jpg")
+
+            cache.cleanup()
+
+            self.assertIsNone(cache.get("media_folder", "old.jpg"))
+            self.assertIsNotNone(cache.get("media_folder", "new.jpg"))
+            self.assertIsNotNone(cache.get("media_folder", "used.jpg"))
+
+
+class RunImageCacheTests(unittest.TestCase):
+    def test_concurrent_callers_share_one_download(self):
+        cache = RunImageCache()
+        calls = {"get_image": 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(4)
+        results = []
+
+        def get_image():
+            with lock:
+                calls["get_image"] += 1
+            time.sleep(0.1)
+            return b"resized", "JPEG"
+
+        def worker():
+            barrier.wait()
+            results.append(cache.get_or_create(("media_folder", "a.jpg"), get_image))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(calls["get_image"], 1)
+        self.assertEqual(results, [(b"resized", "JPEG")] * 4)
+
+    def test_failed_download_is_retried(self):
+        cache = RunImageCache()
+        self.assertIsNone(cache.get_or_create("key", lambda: None))
+        self.assertEqual(cache.get_or_create("key", lambda: b"resized"), b"resized")
+
+
+if __name__ == "__main__":
+    unittest.main()
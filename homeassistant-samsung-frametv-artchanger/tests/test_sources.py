@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import requests
+
+from sources import bing_wallpapers, google_art, media_folder
+from utils.uploaded_files import UploadedFilesStore
+
+
+def _store(tmp, source_name, files):
+    store = UploadedFilesStore(os.path.join(tmp, "uploaded_files.jsonl"))
+    for index, file_name in enumerate(files):
+        store.add({"file": file_name, "remote_filename": f"MY_F{index:04d}", "tv_ip": None, "source": source_name})
+    return store
+
+
+class MediaFolderSourceTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self._folder_path = media_folder.folder_path
+        media_folder.folder_path = self.tmp.name
+
+    def tearDown(self):
+        media_folder.folder_path = self._folder_path
+        self.tmp.cleanup()
+
+    def _write(self, name, payload):
+        with open(os.path.join(self.tmp.name, name), "wb") as handle:
+            handle.write(payload)
+
+    def test_estimate_unseen_counts_files_not_in_history(self):
+        self._write("a.jpg", b"a")
+        self._write("b.png", b"b")
+        self._write("notes.txt", b"c")
+
+        store = _store(self.tmp.name, media_folder.__name__, ["a.jpg"])
+        self.assertEqual(media_folder.estimate_unseen(store), 1)
+
+        store.add({"file": "b.png", "remote_filename": "MY_F0009", "tv_ip": None, "source": media_folder.__name__})
+        self.assertEqual(media_folder.estimate_unseen(store), 0)
+
+    def test_cache_version_changes_when_file_is_replaced(self):
+        self._write("a.jpg", b"first")
+        first = media_folder.cache_version("a.jpg")
+
+        self._write("a.jpg", b"replaced")
+        self.assertIsNotNone(first)
+        self.assertNotEqual(media_folder.cache_version("a.jpg"), first)
+        self.assertIsNone(media_folder.cache_version("missing.jpg"))
+
+
+class BingWallpapersSourceTests(unittest.TestCase):
+    def test_estimate_unseen_subtracts_history_from_archive_days(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            available_days = (datetime.now() - bing_wallpapers.start_date).days + 1
+            store = _store(tmp, bing_wallpapers.__name__, ["https://bing.npanuhin.me/US/en/2021-08-28.jpg"])
+            self.assertEqual(bing_wallpapers.estimate_unseen(store), available_days - 1)
+
+
+class GoogleArtSourceTests(unittest.TestCase):
+    def test_estimate_unseen_subtracts_history_from_image_list(self):
+        image_list = [{"link": "asset/one"}, {"link": "asset/two"}]
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(google_art, "get_image_list", return_value=image_list):
+            store = _store(tmp, google_art.__name__, ["https://artsandculture.google.com/asset/one"])
+            self.assertEqual(google_art.estimate_unseen(store), 1)
+
+    def test_estimate_unseen_falls_back_when_list_fails(self):
+        failing = mock.Mock(side_effect=requests.RequestException("offline"))
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(google_art, "get_image_list", failing):
+            self.assertEqual(google_art.estimate_unseen(_store(tmp, google_art.__name__, [])), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import json
+import os
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+from utils import uploaded_files
+from utils.uploaded_files import UploadedFilesStore
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _fake_orjson():
+    # Stands in for orjson so its branch runs even where the package is not installed
+    return types.SimpleNamespace(
+        OPT_APPEND_NEWLINE=1,
+        dumps=lambda record, option=0: json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        + (b"\n" if option & 1 else b""),
+        loads=json.loads,
+    )
+
+
+def _entry(file_name, remote_filename, tv_ip=None, source="bing_wallpapers"):
+    return {"file": file_name, "remote_filename": remote_filename, "tv_ip": tv_ip, "source": source}
+
+
+class UploadedFilesStoreTests(unittest.TestCase):
+    def test_add_appends_and_reloads(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "uploaded_files.jsonl")
+            store = UploadedFilesStore(path)
+            store.add(_entry("a.jpg", "MY_F0001"))
+            store.add(_entry("b.jpg", "MY_F0002"))
+
+            with open(path, "r", encoding="utf-8") as handle:
+                self.assertEqual(len(handle.readlines()), 2)
+
+            reloaded = UploadedFilesStore(path)
+            self.assertEqual(len(reloaded), 2)
+            self.assertEqual(reloaded.get("b.jpg", "bing_wallpapers", None)["remote_filename"], "MY_F0002")
+
+    def test_lookup_with_and_without_tv_ip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = UploadedFilesStore(os.path.join(tmp, "uploaded_files.jsonl"))
+            store.add(_entry("a.jpg", "MY_F0001", tv_ip="192.168.1.10"))
+
+            self.assertIsNone(store.get("a.jpg", "bing_wallpapers", "192.168.1.11"))
+            self.assertEqual(store.get("a.jpg", "bing_wallpapers", "192.168.1.10")["remote_filename"], "MY_F0001")
+            self.assertEqual(store.get("a.jpg", "bing_wallpapers", None, match_tv_ip=False)["remote_filename"], "MY_F0001")
+            self.assertEqual(store.files("bing_wallpapers"), {"a.jpg"})
+            self.assertEqual(store.files("google_art"), set())
+
+    def test_remove_writes_tombstone_and_compacts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "uploaded_files.jsonl")
+            store = UploadedFilesStore(path)
+            for index in range(4):
+                store.add(_entry(f"{index}.jpg", f"MY_F000{index}"))
+
+            self.assertTrue(store.remove("0.jpg", "bing_wallpapers", None))
+            self.assertFalse(store.remove("0.jpg", "bing_wallpapers", None))
+            self.assertIsNone(store.get("0.jpg", "bing_wallpapers", None))
+
+            # One entry plus its tombstone out of five lines exceeds the threshold
+            with open(path, "r", encoding="utf-8") as handle:
+                lines = [json.loads(line) for line in handle]
+            self.assertEqual(len(lines), 3)
+            self.assertEqual(len(UploadedFilesStore(path)), 3)
+
+    def test_truncated_line_is_dropped_on_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "uploaded_files.jsonl")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(json.dumps(_entry("a.jpg", "MY_F0001")) + "\n")
+                handle.write('{"file": "b.jpg", "remote_fil')
+
+            store = UploadedFilesStore(path)
+            store.add(_entry("c.jpg", "MY_F0003"))
+
+            reloaded = UploadedFilesStore(path)
+            self.assertEqual(len(reloaded), 2)
+            self.assertIsNotNone(reloaded.get("c.jpg", "bing_wallpapers", None))
+
+    def test_imports_legacy_json_list_read_only(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy_path = os.path.join(tmp, "uploaded_files.json")
+            with open(legacy_path, "w", encoding="utf-8") as handle:
+                json.dump([_entry("a.jpg", "MY_F0001", source="media_folder")], handle)
+
+            store = UploadedFilesStore(os.path.join(tmp, "uploaded_files.jsonl"), legacy_path=legacy_path)
+
+            self.assertEqual(store.get("a.jpg", "media_folder", None)["remote_filename"], "MY_F0001")
+            self.assertTrue(os.path.exists(legacy_path))
+            self.assertFalse(os.path.exists(f"{legacy_path}.migrated"))
+
+
+class SerializationTests(unittest.TestCase):
+    record = {"file": "Mondriaan – Compositie.jpg", "remote_filename": "MY_F0001", "tv_ip": None, "source": "media_folder"}
+
+    def test_json_fallback_writes_raw_utf8(self):
+        with mock.patch.object(uploaded_files, "orjson", None):
+            line = uploaded_files._dumps(self.record)
+            self.assertIn("–".encode("utf-8"), line)
+            self.assertEqual(uploaded_files._loads(line), self.record)
+
+    def test_store_roundtrip_through_orjson_branch(self):
+        with mock.patch.object(uploaded_files, "orjson", orjson or _fake_orjson()), tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "uploaded_files.jsonl")
+            UploadedFilesStore(path).add(self.record)
+            reloaded = UploadedFilesStore(path)
+            self.assertEqual(reloaded.get(self.record["file"], "media_folder", None), self.record)
+
+    @unittest.skipUnless(orjson, "orjson is not installed")
+    def test_both_branches_write_identical_lines(self):
+        with mock.patch.object(uploaded_files, "orjson", None):
+            fallback = uploaded_files._dumps(self.record)
+        with mock.patch.object(uploaded_files, "orjson", orjson):
+            self.assertEqual(uploaded_files._dumps(self.record), fallback)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from utils.uploaded_files import UploadedFilesStore
+from utils.utils import Utils
+
+
+class ResizeAndCropImageTests(unittest.TestCase):
+    def _sample_image(self, width, height, color=(30, 120, 200)):
+        image = Image.new("RGB", (width, height), color)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG")
+        return buffer.getvalue()
+
+    def _resized_size(self, width, height):
+        output = Utils.resize_and_crop_image(self._sample_image(width, height))
+        self.assertIsInstance(output, bytes)
+        with Image.open(io.BytesIO(output)) as image:
+            return image.size
+
+    def test_large_image_uses_integer_reduce(self):
+        self.assertEqual(self._resized_size(8000, 4500), (3840, 2160))
+
+    def test_large_image_with_different_ratio(self):
+        self.assertEqual(self._resized_size(6000, 4000), (3840, 2160))
+        self.assertEqual(self._resized_size(4000, 9000), (3840, 2160))
+
+    def test_large_images_in_other_modes(self):
+        for mode in ("1", "P", "I;16", "RGBA", "LA", "CMYK"):
+            with self.subTest(mode=mode):
+                image = Image.new(mode, (8000, 4500))
+                buffer = io.BytesIO()
+                image.save(buffer, format="TIFF")
+                output = Utils.resize_and_crop_image(buffer.getvalue())
+                with Image.open(io.BytesIO(output)) as resized:
+                    self.assertEqual(resized.size, (3840, 2160))
+
+    def test_small_image_is_upscaled(self):
+        self.assertEqual(self._resized_size(1200, 900), (3840, 2160))
+
+    def test_gpu_resize_falls_back_to_pillow(self):
+        output = Utils.resize_and_crop_image(self._sample_image(6000, 4000), use_gpu=True)
+        with Image.open(io.BytesIO(output)) as image:
+            self.assertEqual(image.size, (3840, 2160))
+
+    def test_cuda_resize_unavailable_without_torch(self):
+        with mock.patch.dict(sys.modules, {"torch": None}):
+            self.assertFalse(Utils.cuda_resize_available())
+
+    def test_custom_target_size(self):
+        output = Utils.resize_and_crop_image(self._sample_image(6000, 4000), 1920, 1080)
+        with Image.open(io.BytesIO(output)) as image:
+            self.assertEqual(image.size, (1920, 1080))
+
+
+class RemoteFilenameLookupTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = UploadedFilesStore(os.path.join(self.tmp.name, "uploaded_files.jsonl"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_single_tv_ignores_recorded_tv_ip(self):
+        self.store.add({"file": "a.jpg", "remote_filename": "MY_F0001", "tv_ip": None, "source": "media_folder"})
+        utils = Utils("192.168.1.10", self.store)
+
+        self.assertIsNone(utils.history_tv_ip("192.168.1.10"))
+        self.assertEqual(utils.get_remote_filename("a.jpg", "media_folder", "192.168.1.10"), "MY_F0001")
+
+    def test_multiple_tvs_lookup_per_tv(self):
+        self.store.add({"file": "a.jpg", "remote_filename": "MY_F0001", "tv_ip": "192.168.1.10", "source": "media_folder"})
+        utils = Utils("192.168.1.10,192.168.1.11", self.store)
+
+        self.assertEqual(
+            utils.get_remote_filenames("a.jpg", "media_folder", ["192.168.1.10", "192.168.1.11"]),
+            {"192.168.1.10": "MY_F0001", "192.168.1.11": None},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class RunImageCache:
+    """In-memory cache of prepared images for a single run.
+
+    Callers asking for the same key while it is being prepared wait for the
+    first one instead of downloading and resizing the image again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Any] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+
+    def get_or_create(self, key: Hashable, create: Callable[[], Optional[Any]]) -> Optional[Any]:
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                cached = self._entries.get(key)
+            if cached is not None:
+                return cached
+
+            # Failures are not cached, so a later caller gets to try again
+            value = create()
+            if value is not None:
+                with self._lock:
+                    self._entries[key] = value
+            return value
+
+class ResizedImageCache:
+    """Disk cache of resized JPEG images.
+
+    Entries are keyed by the processing tag (resize and encoder settings), the
+    source and url, and an optional version of the source file. Changing any of
+    these misses the old entry, which then ages out through the size sweep.
+    """
+
+    def __init__(self, cache_dir: str, tag: str = '', max_bytes: int = 500 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.tag = tag
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, source_name: str, image_url: str, version: Optional[str] = None) -> str:
+        raw_key = f'{self.tag}:{source_name}:{image_url}:{version or ""}'
+        key = hashlib.sha256(raw_key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'{key}.jpg')
+
+    def get(self, source_name: str, image_url: str, version: Optional[str] = None) -> Optional[bytes]:
+        path = self._path(source_name, image_url, version)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        # Bump the mtime so the size sweep evicts the least recently used files first
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, source_name: str, image_url: str, data: bytes, version: Optional[str] = None) -> None:
+        path = self._path(source_name, image_url, version)
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        except OSError as e:
+            logging.warning(f'Could not write image cache file {path}: {str(e)}')
+            return
+
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.warning(f'Could not write image cache file {path}: {str(e)}')
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def cleanup(self) -> None:
+        try:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                if not os.path.isfile(path):
+                    continue
+                stat = os.stat(path)
+                entries.append((path, stat.st_mtime, stat.st_size))
+        except OSError:
+            logging.warning(f'Image cache cleanup failed for {self.cache_dir}')
+            return
+
+        total = sum(size for _, _, size in entries)
+        entries.sort(key=lambda item: item[1])
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import tempfile
+from threading import RLock
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library is a slower fallback
+    orjson = None
+
+EntryKey = Tuple[str, str, Optional[str]]
+
+def _dumps(record: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+    # Match orjson's output byte for byte: compact separators and raw UTF-8
+    return (json.dumps(record, separators=(',', ':'), ensure_ascii=False) + '\n').encode('utf-8')
+
+def _loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class UploadedFilesStore:
+    """Append-only JSONL history of uploaded images with an in-memory index.
+
+    Every upload appends a single line. Removing an entry appends a tombstone
+    line, and the file is compacted once superseded lines make up more than
+    a quarter of it.
+    """
+
+    compact_ratio = 0.25
+
+    def __init__(self, path: str, legacy_path: Optional[str] = None):
+        self.path = path
+        self._lock = RLock()
+        # (file, source) -> {tv_ip: entry}, in upload order
+        self._index: Dict[Tuple[str, str], Dict[Optional[str], Dict[str, Any]]] = {}
+        self._lines = 0
+        self._live = 0
+
+        if not os.path.isfile(self.path) and legacy_path and os.path.isfile(legacy_path):
+            self._migrate_legacy(legacy_path)
+        else:
+            self._load()
+
+    @staticmethod
+    def _key(entry: Dict[str, Any]) -> EntryKey:
+        return entry['file'], entry['source'], entry.get('tv_ip')
+
+    def _load(self) -> None:
+        if not os.path.isfile(self.path):
+            return
+
+        damaged = False
+        with open(self.path, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = _loads(line)
+                except ValueError:
+                    # A crash mid-append can leave a truncated last line behind
+                    logging.warning(f'Skipping unreadable line in {self.path}')
+                    damaged = True
+                    continue
+                self._lines += 1
+                if record.get('op') == 'del':
+                    self._discard(tuple(record['key']))
+                else:
+                    self._put(record)
+
+        # Rewrite a damaged file so the next append does not land on the broken line
+        if damaged or self._needs_compaction():
+            self.compact()
+
+    def _migrate_legacy(self, legacy_path: str) -> None:
+        try:
+            with open(legacy_path, 'rb') as f:
+                entries = _loads(f.read())
+        except (OSError, ValueError) as e:
+            logging.error(f'Could not read {legacy_path}: {str(e)}')
+            return
+
+        for entry in entries if isinstance(entries, list) else []:
+            if isinstance(entry, dict) and 'file' in entry and 'source' in entry:
+                self._put(entry)
+        # The legacy file is only read: the web add-on migrates TV content ids from it
+        self.compact()
+
+    def _put(self, entry: Dict[str, Any]) -> None:
+        file_name, source_name, tv_ip = self._key(entry)
+        per_tv = self._index.setdefault((file_name, source_name), {})
+        if tv_ip not in per_tv:
+            self._live += 1
+        per_tv[tv_ip] = entry
+
+    def _discard(self, key: EntryKey) -> bool:
+        file_name, source_name, tv_ip = key
+        per_tv = self._index.get((file_name, source_name))
+        if not per_tv or tv_ip not in per_tv:
+            return False
+        del per_tv[tv_ip]
+        if not per_tv:
+            del self._index[(file_name, source_name)]
+        self._live -= 1
+        return True
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        with open(self.path, 'ab') as f:
+            f.write(_dumps(record))
+        self._lines += 1
+
+    def _needs_compaction(self) -> bool:
+        return self._lines > 0 and (self._lines - self._live) / self._lines > self.compact_ratio
+
+    def get(self, file_name: str, source_name: str, tv_ip: Optional[str], match_tv_ip: bool = True) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            per_tv = self._index.get((file_name, source_name))
+            if not per_tv:
+                return None
+            if match_tv_ip:
+                return per_tv.get(tv_ip)
+            return next(iter(per_tv.values()))
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._put(entry)
+            self._append(entry)
+            if self._needs_compaction():
+                self.compact()
+
+    def remove(self, file_name: str, source_name: str, tv_ip: Optional[str]) -> bool:
+        with self._lock:
+            key = (file_name, source_name, tv_ip)
+            if not self._discard(key):
+                return False
+            self._append({'op': 'del', 'key': list(key)})
+            if self._needs_compaction():
+                self.compact()
+            return True
+
+    def entries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [entry for per_tv in self._index.values() for entry in per_tv.values()]
+
+    def files(self, source_name: str) -> Set[str]:
+        with self._lock:
+            return {file_name for file_name, entry_source in self._index if entry_source == source_name}
+
+    def compact(self) -> None:
+        with self._lock:
+            entries = self.entries()
+            # Write next to the target and swap it in, so a crash never leaves a half-written file
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(b''.join(_dumps(entry) for entry in entries))
+                os.replace(temp_path, self.path)
+            except OSError:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+                raise
+            self._lines = len(entries)
+            self._live = len(entries)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._live
@@ -1,53 +1,129 @@
+import logging
 from io import BytesIO
 from PIL import Image
-from typing import List, Dict, Optional
+from typing import Dict, List, Optional, Tuple
+
+from utils.uploaded_files import UploadedFilesStore
+
+# Bump when the resize pipeline changes in a way the settings below do not capture
+RESIZE_PIPELINE_VERSION = 2
+# Modes the JPEG encoder accepts as-is; everything else is converted to RGB first
+JPEG_MODES = ('L', 'RGB', 'CMYK')
+# The upload goes over the LAN, so favour encode speed: no extra Huffman pass,
+# baseline instead of progressive and 4:2:0 chroma subsampling
+JPEG_SAVE_OPTIONS = {'quality': 88, 'optimize': False, 'progressive': False, 'subsampling': 2}
 
 class Utils:
-    def __init__(self, tvips: str, uploaded_files: List[Dict[str, str]]):
+    def __init__(self, tvips: str, uploaded_files: UploadedFilesStore):
         self.tvips = tvips
         self.uploaded_files = uploaded_files
         self.check_tv_ip = len(tvips.split(',')) > 1 if tvips else False #only check the tv_ip if there is more than one tv_ip
 
     @staticmethod
-    def resize_and_crop_image(image_data, target_width=3840, target_height=2160):
-        with Image.open(image_data) as img:
-            # Calculate the aspect ratio
-            img_ratio = img.width / img.height
-            target_ratio = target_width / target_height
-
-            if img_ratio > target_ratio:
-                # Image is wider than target, resize based on height
-                new_height = target_height
-                new_width = int(new_height * img_ratio)
-            else:
-                # Image is taller than target, resize based on width
-                new_width = target_width
-                new_height = int(new_width / img_ratio)
+    def _center_crop_box(width: int, height: int, target_width: int, target_height: int) -> Tuple[int, int, int, int]:
+        # Calculate the aspect ratio
+        img_ratio = width / height
+        target_ratio = target_width / target_height
+
+        # Calculate the center crop window on the source image
+        if img_ratio > target_ratio:
+            # Image is wider than target, crop the sides
+            crop_width = int(height * target_ratio)
+            crop_height = height
+        else:
+            # Image is taller than target, crop top and bottom
+            crop_width = width
+            crop_height = int(width / target_ratio)
+
+        left = (width - crop_width) // 2
+        top = (height - crop_height) // 2
+        return left, top, left + crop_width, top + crop_height
 
-            # Resize the image
-            img = img.resize((new_width, new_height), Image.LANCZOS)
+    @staticmethod
+    def resize_and_crop_image(image_data: bytes, target_width=3840, target_height=2160, use_gpu=False) -> bytes:
+        if use_gpu:
+            resized = Utils._resize_and_crop_image_cuda(image_data, target_width, target_height)
+            if resized is not None:
+                return resized
+
+        with Image.open(BytesIO(image_data)) as img:
+            # reduce() and the JPEG encoder only take a few modes; palette, bilevel,
+            # 16-bit and alpha images are flattened to RGB first
+            if img.mode not in JPEG_MODES:
+                img = img.convert('RGB')
 
-            # Calculate dimensions for center cropping
-            left = (new_width - target_width) // 2
-            top = (new_height - target_height) // 2
-            right = left + target_width
-            bottom = top + target_height
+            box = Utils._center_crop_box(img.width, img.height, target_width, target_height)
+            crop_width = box[2] - box[0]
+            crop_height = box[3] - box[1]
 
-            # Perform center crop
-            img = img.crop((left, top, right, bottom))
+            # Downsample by the largest integer factor with a cheap box average,
+            # leaving only the fractional remainder for the Lanczos pass
+            factor = min(crop_width // target_width, crop_height // target_height)
+            if factor >= 2:
+                img = img.reduce(factor, box=box)
+            else:
+                img = img.crop(box)
 
-            # Save the processed image to a BytesIO object
+            if img.size != (target_width, target_height):
+                img = img.resize((target_width, target_height), Image.LANCZOS)
+
+            # Save the processed image and hand back the encoded bytes
             output = BytesIO()
-            img.save(output, format='JPEG', quality=90)
-            output.seek(0)
-            return output
+            img.save(output, format='JPEG', **JPEG_SAVE_OPTIONS)
+            return output.getvalue()
+
+    @staticmethod
+    def cuda_resize_available() -> bool:
+        try:
+            import torch
+            import torchvision.io  # noqa: F401
+        except ImportError:
+            logging.info('GPU resize requested but torch/torchvision is not installed, using Pillow')
+            return False
+
+        if not torch.cuda.is_available():
+            logging.info('GPU resize requested but no CUDA device is available, using Pillow')
+            return False
+        return True
+
+    @staticmethod
+    def _resize_and_crop_image_cuda(image_data: bytes, target_width: int, target_height: int) -> Optional[bytes]:
+        # Optional path for hosts with a CUDA device (e.g. Jetson); returns None so
+        # the caller falls back to Pillow when torch, CUDA or a JPEG input is missing
+        if not Utils.cuda_resize_available():
+            return None
+
+        import torch
+        import torch.nn.functional as F
+        from torchvision.io import ImageReadMode, decode_jpeg, encode_jpeg
+
+        try:
+            encoded = torch.frombuffer(bytearray(image_data), dtype=torch.uint8)
+            img = decode_jpeg(encoded, mode=ImageReadMode.RGB, device='cuda')
+            _, height, width = img.shape
+            left, top, right, bottom = Utils._center_crop_box(width, height, target_width, target_height)
+            img = img[:, top:bottom, left:right].unsqueeze(0).float()
+            img = F.interpolate(img, size=(target_height, target_width), mode='bicubic', align_corners=False, antialias=True)
+            img = img.squeeze(0).clamp(0, 255).round().to(torch.uint8)
+            return encode_jpeg(img.cpu(), quality=JPEG_SAVE_OPTIONS['quality']).numpy().tobytes()
+        except (RuntimeError, ValueError) as e:
+            logging.warning(f'GPU resize failed, using Pillow: {str(e)}')
+            return None
+
+    @staticmethod
+    def resize_cache_tag(target_width=3840, target_height=2160, use_gpu=False) -> str:
+        # Everything that changes the bytes resize_and_crop_image produces
+        options = ','.join(f'{name}={value}' for name, value in sorted(JPEG_SAVE_OPTIONS.items()))
+        backend = 'cuda' if use_gpu else 'pillow'
+        return f'v{RESIZE_PIPELINE_VERSION}:{target_width}x{target_height}:{backend}:{options}'
+
+    def history_tv_ip(self, tv_ip: Optional[str]) -> Optional[str]:
+        # Uploads are only recorded per TV when there is more than one TV
+        return tv_ip if self.check_tv_ip else None
 
     def get_remote_filename(self, file_name: str, source_name: str, tv_ip: str) -> Optional[str]:
-        for uploaded_file in self.uploaded_files:
-            if uploaded_file['file'] == file_name and uploaded_file['source'] == source_name:
-                if self.check_tv_ip:
-                    if uploaded_file['tv_ip'] == tv_ip:
-                        return uploaded_file['remote_filename']
-                else:
-                    return uploaded_file['remote_filename']
-        return None
\ No newline at end of file
+        uploaded_file = self.uploaded_files.get(file_name, source_name, self.history_tv_ip(tv_ip), match_tv_ip=self.check_tv_ip)
+        return uploaded_file['remote_filename'] if uploaded_file else None
+
+    def get_remote_filenames(self, file_name: str, source_name: str, tv_ips: List[str]) -> Dict[str, Optional[str]]:
+        return {tv_ip: self.get_remote_filename(file_name, source_name, tv_ip) for tv_ip in tv_ips}